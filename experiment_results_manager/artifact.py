@@ -1,9 +1,20 @@
+import builtins
+import hashlib
 import posixpath
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
+from typing import Callable, Dict, Optional
 
 import fsspec
 
+from experiment_results_manager.fsspec_util import get_fs_from_uri
+
+try:
+    from pybase64 import b64encode
+except ImportError:  # pragma: no cover
+    from base64 import b64encode  # type: ignore[assignment]
+
 
 class ArtifactType(str, Enum):
     PNG = "png"
@@ -20,16 +31,123 @@ class ArtifactBase:
     artifact_type: ArtifactType
 
 
-@dataclass
-class Artifact(ArtifactBase):
-    bytes: bytes
+class Artifact:
+    # Not an ArtifactBase subclass: pydantic needs a __dict__ on ArtifactBase
+    # instances, which would defeat __slots__ here
+    __slots__ = (
+        "id",
+        "filename",
+        "artifact_type",
+        "_bytes",
+        "_data_uri",
+        "_content_hash",
+    )
+
+    def __init__(
+        self, id: str, filename: str, artifact_type: ArtifactType, bytes: bytes
+    ) -> None:
+        self.id = id
+        self.filename = filename
+        self.artifact_type = artifact_type
+        self._bytes: Optional[builtins.bytes] = bytes
+        self._data_uri: Optional[str] = None
+        self._content_hash: Optional[str] = None
+
+    @property
+    def bytes(self) -> bytes:
+        return self._bytes  # type: ignore[return-value]
+
+    @bytes.setter
+    def bytes(self, value: bytes) -> None:
+        self._bytes = value
+        # Drop the values derived from the old bytes
+        self._data_uri = None
+        self._content_hash = None
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Artifact):
+            return NotImplemented
+        return (self.id, self.filename, self.artifact_type, self.bytes) == (
+            other.id,
+            other.filename,
+            other.artifact_type,
+            other.bytes,
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return (
+            f"Artifact(id={self.id!r}, filename={self.filename!r}, "
+            f"artifact_type={self.artifact_type!r}, bytes={self.bytes!r})"
+        )
+
+    def data_uri(self, mime_type: str) -> str:
+        """
+        Returns the artifact as a base64 `data:` URI. The encoded string is computed
+        on first use and cached on the artifact, so rendering the same artifact
+        repeatedly (e.g. in several `compare_runs` calls) only encodes it once.
+        """
+        if self._data_uri is None or not self._data_uri.startswith(
+            f"data:{mime_type};"
+        ):
+            b64 = b64encode(self.bytes).decode("ascii")
+            self._data_uri = f"data:{mime_type};base64,{b64}"
+        return self._data_uri
+
+    def content_hash(self) -> str:
+        """Returns a BLAKE2b digest of the artifact bytes, computed once."""
+        if self._content_hash is None:
+            self._content_hash = hashlib.blake2b(self.bytes, digest_size=16).hexdigest()
+        return self._content_hash
+
+
+class LazyArtifact(Artifact):
+    """
+    An `Artifact` whose bytes are fetched by calling `loader` on first access rather
+    than when it is created, so loading a run does not fetch artifacts that are
+    never rendered or saved.
+    """
+
+    __slots__ = ("_loader",)
+
+    def __init__(
+        self,
+        id: str,
+        filename: str,
+        artifact_type: ArtifactType,
+        loader: Callable[[], bytes],
+    ) -> None:
+        super().__init__(id, filename, artifact_type, None)  # type: ignore[arg-type]
+        self._loader = loader
+
+    @property
+    def bytes(self) -> bytes:
+        if self._bytes is None:
+            self._bytes = self._loader()
+        return self._bytes
+
+    @bytes.setter
+    def bytes(self, value: bytes) -> None:
+        Artifact.bytes.fset(self, value)  # type: ignore[attr-defined]
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the bytes have been fetched (or assigned) yet."""
+        return self._bytes is not None
+
+    def __repr__(self) -> str:
+        return (
+            f"LazyArtifact(id={self.id!r}, filename={self.filename!r}, "
+            f"artifact_type={self.artifact_type!r}, loader={self._loader!r})"
+        )
 
 
 def artifact_metadata_to_artifact(
     artifact_metadata: ArtifactBase, experiment_run_path: str
 ) -> Artifact:
     artifact_path = posixpath.join(experiment_run_path, artifact_metadata.filename)
-    with fsspec.open(artifact_path, "r") as f:
+    with fsspec.open(artifact_path, "rb") as f:
         data = f.read()
     return Artifact(
         artifact_metadata.id,
@@ -37,3 +155,38 @@ def artifact_metadata_to_artifact(
         artifact_metadata.artifact_type,
         data,
     )
+
+
+def load_artifacts(
+    artifacts_metadata: Dict[str, ArtifactBase],
+    artifacts_path: str,
+    fs: Optional[fsspec.AbstractFileSystem] = None,
+) -> Dict[str, Artifact]:
+    """
+    Loads the artifacts described by `artifacts_metadata` from `artifacts_path`.
+
+    The files are read on a thread pool so that remote filesystems (S3, GCS, ...)
+    overlap the per-file round trips instead of reading one file at a time.
+    """
+    if fs is None:
+        fs = get_fs_from_uri(artifacts_path)
+    if len(artifacts_metadata) == 0:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(16, len(artifacts_metadata))) as pool:
+        futures = {
+            a: pool.submit(
+                fs.cat_file,
+                posixpath.join(artifacts_path, artifact_metadata.filename),
+            )
+            for a, artifact_metadata in artifacts_metadata.items()
+        }
+        return {
+            a: Artifact(
+                artifact_metadata.id,
+                artifact_metadata.filename,
+                artifact_metadata.artifact_type,
+                futures[a].result(),
+            )
+            for a, artifact_metadata in artifacts_metadata.items()
+        }
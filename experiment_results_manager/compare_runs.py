@@ -1,132 +1,387 @@
-import base64
-from typing import Any, Dict, List, Set, Tuple
+import functools
+import hashlib
+import os
+import posixpath
+import re
+import threading
+import urllib.parse
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Any, Dict, Hashable, List, Optional, Tuple
 
-import plotly.io
 from plotly.offline import get_plotlyjs
 
-from experiment_results_manager.artifact import ArtifactType
+from experiment_results_manager.artifact import Artifact, ArtifactType, LazyArtifact
 from experiment_results_manager.experiment_run import ExperimentRun
+from experiment_results_manager.fsspec_util import write_to_file
 from experiment_results_manager.html_util import (
     dicts_to_html_table,
+    escape_html,
     human_readable_bytes,
+    image_size,
 )
 
+_CSS = (
+    "<style>table{text-align:center}th{background-color:#ddd;color:#000}"
+    "tr:nth-child(odd){background-color:#e7e6e6;color:#000}tr:nth-child(2n)"
+    "{background-color:#fff;color:#000}tr:hover{background-color:#d1eaff}tbo"
+    "dy{font-family:monospace;font-weight:400}</style>"
+)
+
+# Rendered reports can be large (embedded images, plotly.js), keep only a few
+_HTML_CACHE_MAXSIZE = 8
+_html_cache: "OrderedDict[Hashable, str]" = OrderedDict()
+_html_cache_lock = threading.Lock()
+
+# Guard the `seen_images` tables used to deduplicate images across runs
+_seen_images_lock = threading.Lock()
+_image_encode_locks = [threading.Lock() for _ in range(16)]
+
+# Plotly div ids must be unique in a page, so they are regenerated whenever a
+# cached report is returned again (e.g. shown in a second notebook cell)
+_PLOTLY_DIV_ID_RE = re.compile(r"plotly-[0-9a-f]{32}")
 
-def compare_runs(*runs: ExperimentRun, **kwargs: Dict[str, Any]) -> str:
+_UNSAFE_FILENAME_CHARS_RE = re.compile(r"[^A-Za-z0-9_.-]")
+
+# Below this many artifacts, a thread pool costs more than it saves
+_PARALLEL_RENDER_MIN_ARTIFACTS = 5
+# Rendering waits on lazily loaded artifact reads as much as on the CPU, so size
+# the pool like ThreadPoolExecutor's I/O-oriented default
+_RENDER_MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+
+def compare_runs(*runs: ExperimentRun, **kwargs: Any) -> str:
     """
     Returns an HTML string containing tables of experiment runs, their parameters,
     metrics, and artifacts.
 
     Args:
         *runs (ExperimentRun): One or more ExperimentRun objects to display.
-        **kwargs (bool): Optional keyword arguments:
-            - inject_css: Whether to inject HTML style code. Defaults to False.
-                          Useful if you are exporting HTML to a file.
+        **kwargs: Optional keyword arguments:
+            - inject_css (bool): Whether to inject HTML style code. Defaults to
+                          False. Useful if you are exporting HTML to a file.
+            - inline_images (bool): Whether to embed PNG/JPG artifacts in the HTML
+                          as base64 data URIs. Defaults to True. If False, the
+                          images are written to `out_dir` and referenced by a
+                          relative path, which keeps the HTML small.
+            - out_dir (str): The directory (URI) the HTML will be saved in.
+                          Required when `inline_images` is False.
+            - ignore_cache (bool): Whether to bypass the in-memory cache of
+                          recently rendered reports. Defaults to False.
 
     Returns:
         str: The HTML string.
     """
+    ignore_cache = kwargs.pop("ignore_cache", False)
+    # Reports that write image files are never cached, the files may be gone
+    if ignore_cache or not kwargs.get("inline_images", True):
+        return _compare_runs(*runs, **kwargs)
+
+    _prefetch_lazy_artifacts(runs)
+    key = _cache_key(runs, kwargs)
+    with _html_cache_lock:
+        cached = _html_cache.get(key)
+        if cached is not None:
+            _html_cache.move_to_end(key)
+    if cached is not None:
+        return _refresh_plotly_div_ids(cached)
 
-    html = ""
+    html = _compare_runs(*runs, **kwargs)
+    with _html_cache_lock:
+        _html_cache[key] = html
+        while len(_html_cache) > _HTML_CACHE_MAXSIZE:
+            _html_cache.popitem(last=False)
+    return html
+
+
+def _refresh_plotly_div_ids(html: str) -> str:
+    if "plotly-graph-div" not in html:
+        return html
+    new_ids: Dict[str, str] = {}
+    return _PLOTLY_DIV_ID_RE.sub(
+        lambda m: new_ids.setdefault(m.group(), f"plotly-{uuid.uuid4().hex}"), html
+    )
+
+
+def _compare_runs(*runs: ExperimentRun, **kwargs: Any) -> str:
+    inline_images: bool = kwargs.get("inline_images", True)
+    out_dir: Optional[str] = kwargs.get("out_dir")
+    if not inline_images and out_dir is None:
+        raise ValueError("out_dir must be provided when inline_images is False")
+
+    parts: List[str] = ["<html><body>"]
     if kwargs.get("inject_css"):
-        html += (
-            "<style>table{text-align:center}th{background-color:#ddd;color:#000}"
-            "tr:nth-child(odd){background-color:#e7e6e6;color:#000}tr:nth-child(2n)"
-            "{background-color:#fff;color:#000}tr:hover{background-color:#d1eaff}tbo"
-            "dy{font-family:monospace;font-weight:400}</style>"
-        )
+        parts.append(_CSS)
 
-    html += dicts_to_html_table(
-        "Metadata",
-        [
-            {
-                "Experiment id": er.experiment_id,
-                "Variant id": er.variant_id,
-                "Run id": er.run_id,
-                "Timestamp (UTC)": er.timestamp_utc.strftime("%Y-%m-%d %H:%M:%S"),
-            }
-            for er in runs
-        ],
-        sort_keys=["Experiment id", "Variant id", "Run id", "Timestamp (UTC)"],
+    parts.append(
+        dicts_to_html_table(
+            "Metadata",
+            [
+                {
+                    "Experiment id": er.experiment_id,
+                    "Variant id": er.variant_id,
+                    "Run id": er.run_id,
+                    "Timestamp (UTC)": er.timestamp_utc.strftime("%Y-%m-%d %H:%M:%S"),
+                }
+                for er in runs
+            ],
+            sort_keys=["Experiment id", "Variant id", "Run id", "Timestamp (UTC)"],
+        )
     )
-    html += dicts_to_html_table("Params", [er.params for er in runs])
-    html += dicts_to_html_table(
-        "Features",
-        [_feature_list_to_dict(er) for er in runs],
+    parts.append(dicts_to_html_table("Params", [er.params for er in runs]))
+    parts.append(
+        dicts_to_html_table(
+            "Features",
+            [_feature_list_to_dict(er) for er in runs],
+        )
     )
-    html += dicts_to_html_table("Metrics", [er.metrics for er in runs])
+    parts.append(dicts_to_html_table("Metrics", [er.metrics for er in runs]))
 
-    dict_keys_set: Set[str] = set()
-    for er in runs:
-        dict_keys_set.update(er.dicts.keys())
-    dict_keys: List[str] = list(dict_keys_set)
-    dict_keys.sort()
+    # Deduplicated, in the order the dicts were first logged
+    dict_keys: List[str] = list(
+        dict.fromkeys(chain.from_iterable(er.dicts for er in runs))
+    )
 
     for dict_key in dict_keys:
-        html += dicts_to_html_table(
-            dict_key,
-            [er.dicts[dict_key] if dict_key in er.dicts else {} for er in runs],
+        parts.append(
+            dicts_to_html_table(
+                dict_key,
+                [er.dicts[dict_key] if dict_key in er.dicts else {} for er in runs],
+            )
         )
-    html += "<h3>Artifacts</h3>"
+    parts.append("<h3>Artifacts</h3>")
+
+    artifact_keys: List[str] = list(
+        dict.fromkeys(chain.from_iterable(er.artifacts for er in runs))
+    )
+
+    # Identical images across runs (e.g. baseline vs variant) share one data URI
+    seen_images: Dict[Tuple[ArtifactType, int], List[Artifact]] = {}
+    tasks = [
+        (k, i, run)
+        for k in artifact_keys
+        for i, run in enumerate(runs)
+        if k in run.artifacts
+    ]
+
+    def _render(task: Tuple[str, int, ExperimentRun]) -> Tuple[List[str], bool]:
+        return _render_artifact_parts(*task, inline_images, out_dir, seen_images)
 
-    artifact_keys_set: Set[str] = set()
-    for er in runs:
-        artifact_keys_set.update(er.artifacts.keys())
-    artifact_keys: List[str] = list(artifact_keys_set)
-    artifact_keys.sort()
+    # Artifacts render independently; base64 encoding, plotly JSON decoding and
+    # reads of lazily loaded artifacts overlap across threads
+    if len(tasks) >= _PARALLEL_RENDER_MIN_ARTIFACTS:
+        with ThreadPoolExecutor(max_workers=_RENDER_MAX_WORKERS) as pool:
+            results = list(pool.map(_render, tasks))
+    else:
+        results = [_render(task) for task in tasks]
 
     add_plotlyjs_to_html: bool = False
-    for k in artifact_keys:
-        html += f"<h3>{k}</h3>"
-        for i, run in enumerate(runs):
-            if k in run.artifacts:
-                artifact_html, add_plotlyjs_to_html_tmp = render_artifact(k, i, run)
-                add_plotlyjs_to_html = add_plotlyjs_to_html or add_plotlyjs_to_html_tmp
-                html += artifact_html
+    previous_k = None
+    for (k, _, _), (artifact_parts, add_plotlyjs_to_html_tmp) in zip(tasks, results):
+        if k != previous_k:
+            parts.append(f"<h3>{escape_html(k)}</h3>")
+            previous_k = k
+        add_plotlyjs_to_html = add_plotlyjs_to_html or add_plotlyjs_to_html_tmp
+        parts.extend(artifact_parts)
 
     if add_plotlyjs_to_html:
-        _window_plotly_config = """\
-            <script type="text/javascript">\
-            window.PlotlyConfig = {MathJaxConfig: 'local'};\
-            </script>"""
-        load_plotlyjs = """\
-            {win_config}
-            <script type="text/javascript">{plotlyjs}</script>\
-            """.format(
-            win_config=_window_plotly_config, plotlyjs=get_plotlyjs()
-        )
-        html = load_plotlyjs + html
+        parts.insert(1, _plotlyjs_prelude())
 
-    html = "<html><body>" + html + "</body></html>"
-    return html
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def _prefetch_lazy_artifacts(runs: Tuple[ExperimentRun, ...]) -> None:
+    """
+    Loads and hashes the not yet loaded `LazyArtifact`s concurrently, so that the
+    cache key does not read them one at a time.
+    """
+    pending = [
+        a
+        for er in runs
+        for a in er.artifacts.values()
+        if isinstance(a, LazyArtifact) and not a.is_loaded
+    ]
+    if len(pending) > 1:
+        with ThreadPoolExecutor(
+            max_workers=min(_RENDER_MAX_WORKERS, len(pending))
+        ) as pool:
+            list(pool.map(Artifact.content_hash, pending))
+
+
+def _cache_key(runs: Tuple[ExperimentRun, ...], kwargs: Dict[str, Any]) -> Hashable:
+    """
+    Builds a hashable key that changes whenever the rendered HTML would. Values
+    are keyed by `str()` since that is how they are rendered; artifacts by their
+    content hash.
+    """
+
+    def _str_items(d: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+        return tuple((k, str(v)) for k, v in d.items())
+
+    return (
+        tuple(
+            (
+                er.experiment_id,
+                er.variant_id,
+                er.run_id,
+                er.timestamp_utc,
+                tuple(str(f) for f in er.features),
+                _str_items(er.params),
+                _str_items(er.metrics),
+                tuple((k, _str_items(d)) for k, d in er.dicts.items()),
+                tuple(
+                    (k, a.id, a.filename, a.artifact_type, a.content_hash())
+                    for k, a in er.artifacts.items()
+                ),
+            )
+            for er in runs
+        ),
+        # Only the options that change the output, other kwargs are ignored
+        (
+            bool(kwargs.get("inject_css")),
+            bool(kwargs.get("inline_images", True)),
+            str(kwargs.get("out_dir")),
+        ),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _plotlyjs_prelude() -> str:
+    # Built on first use rather than at import, plotly.js is several MB
+    return (
+        '<script type="text/javascript">'
+        "window.PlotlyConfig = {MathJaxConfig: 'local'};"
+        "</script>"
+        f'<script type="text/javascript">{get_plotlyjs()}</script>'
+    )
 
 
 def _feature_list_to_dict(er: ExperimentRun) -> Dict[str, Any]:
     return dict([(str(i + 1), f) for i, f in enumerate(er.features)])
 
 
-def render_artifact(k: str, i: int, run: ExperimentRun) -> Tuple[str, bool]:
+def render_artifact(
+    k: str,
+    i: int,
+    run: ExperimentRun,
+    inline_images: bool = True,
+    out_dir: Optional[str] = None,
+    seen_images: Optional[Dict[Tuple[ArtifactType, int], List[Artifact]]] = None,
+) -> Tuple[str, bool]:
+    parts, add_plotlyjs_to_html = _render_artifact_parts(
+        k, i, run, inline_images, out_dir, seen_images
+    )
+    return "".join(parts), add_plotlyjs_to_html
+
+
+def _render_artifact_parts(
+    k: str,
+    i: int,
+    run: ExperimentRun,
+    inline_images: bool,
+    out_dir: Optional[str],
+    seen_images: Optional[Dict[Tuple[ArtifactType, int], List[Artifact]]],
+) -> Tuple[List[str], bool]:
+    """
+    Like `render_artifact` but returns the HTML fragments unjoined, so that large
+    data URIs are copied only once, into the final document.
+    """
     add_plotlyjs_to_html = False
-    html = f"<h4>Run {i+1}</h4>"
+    parts: List[str] = [f"<h4>Run {i+1}</h4>"]
     artifact = run.artifacts[k]
     if artifact.artifact_type == ArtifactType.PLOTLY_JSON:
-        render_pl_fig = plotly.io.from_json(artifact.bytes.decode("utf-8"))
         add_plotlyjs_to_html = True
-        html += render_pl_fig.to_html(full_html=False, include_plotlyjs=False)
-    elif artifact.artifact_type == ArtifactType.PNG:
-        b64_img = base64.b64encode(artifact.bytes)
-        html += '<img src="data:image/png;base64,'
-        html += b64_img.decode("utf-8")
-        html += '">'
-    elif artifact.artifact_type == ArtifactType.JPG:
-        b64_img = base64.b64encode(artifact.bytes)
-        html += '<img src="data:image/jpg;base64,'
-        html += b64_img.decode("utf-8")
-        html += '">'
+        parts.append(_plotly_json_bytes_to_html(artifact.bytes))
+    elif artifact.artifact_type in (ArtifactType.PNG, ArtifactType.JPG):
+        if inline_images:
+            src = _image_data_uri(artifact, seen_images)
+        else:
+            if out_dir is None:
+                raise ValueError("out_dir must be provided when inline_images is False")
+            filename = (
+                f"{_artifact_file_stem(k)}_{i + 1}.{artifact.artifact_type.value}"
+            )
+            write_to_file(artifact.bytes, posixpath.join(out_dir, filename))
+            src = urllib.parse.quote(filename)
+        parts.extend(_img_tag_parts(src, artifact))
     elif artifact.artifact_type == ArtifactType.BINARY:
-        html += (
-            f"<pre><code>Filename: {artifact.filename}\n"
+        parts.append(
+            f"<pre><code>Filename: {escape_html(artifact.filename)}\n"
             f"Size: {human_readable_bytes(len(artifact.bytes))}</pre></code>"
         )
 
-    return html, add_plotlyjs_to_html
+    return parts, add_plotlyjs_to_html
+
+
+def _artifact_file_stem(k: str) -> str:
+    """
+    Turns an artifact key into a file name stem that stays inside `out_dir`.
+    Keys that had to be changed get a short hash so they cannot collide.
+    """
+    stem = _UNSAFE_FILENAME_CHARS_RE.sub("_", k).lstrip(".")
+    if stem == k:
+        return stem
+    digest = hashlib.blake2b(k.encode("utf-8"), digest_size=4).hexdigest()
+    return f"{stem}_{digest}" if stem else digest
+
+
+def _image_data_uri(
+    artifact: Artifact,
+    seen_images: Optional[Dict[Tuple[ArtifactType, int], List[Artifact]]],
+) -> str:
+    """
+    Returns the data URI of an image artifact, reusing the one of an already
+    rendered artifact with the same bytes instead of encoding them again.
+    """
+    mime_type = f"image/{artifact.artifact_type.value}"
+    if seen_images is None:
+        return artifact.data_uri(mime_type)
+
+    data = artifact.bytes
+    key = (artifact.artifact_type, len(data))
+    # Artifacts are rendered on a thread pool, so the table is shared between
+    # threads. Images of the same size are matched and encoded under the same
+    # stripe lock, so a duplicate waits for the first encoding instead of
+    # repeating it, while images of other sizes encode in parallel.
+    with _seen_images_lock:
+        candidates = seen_images.setdefault(key, [])
+    with _image_encode_locks[hash(key) % len(_image_encode_locks)]:
+        for other in candidates:
+            if other.bytes == data:
+                return other.data_uri(mime_type)
+        candidates.append(artifact)
+        return artifact.data_uri(mime_type)
+
+
+def _img_tag_parts(src: str, artifact: Artifact) -> List[str]:
+    # Explicit dimensions let the browser lay out the page before decoding
+    size = image_size(artifact.bytes)
+    size_attrs = f' width="{size[0]}" height="{size[1]}"' if size else ""
+    return ['<img src="', src, f'"{size_attrs} loading="lazy">']
+
+
+def _plotly_json_bytes_to_html(figure_json: bytes) -> str:
+    """
+    Renders a serialized plotly figure as a `<div>` + `Plotly.newPlot` snippet.
+
+    The stored JSON is embedded as-is, avoiding the `plotly.io.from_json` +
+    `Figure.to_html` round trip which would build a full `Figure` object only to
+    serialize the same data again. Requires plotly.js to be loaded on the page.
+    """
+    div_id = f"plotly-{uuid.uuid4().hex}"
+    # Guard against the JSON closing the surrounding <script> tag
+    figure_js = figure_json.decode("utf-8").replace("</", "<\\/")
+    return (
+        f'<div id="{div_id}" class="plotly-graph-div" '
+        'style="height:100%; width:100%;"></div>'
+        '<script type="text/javascript">'
+        "window.PLOTLYENV=window.PLOTLYENV || {};"
+        "(function(figure){"
+        'figure.config = {"responsive": true};'
+        f'Plotly.newPlot("{div_id}", figure);'
+        f"}})({figure_js});"
+        "</script>"
+    )
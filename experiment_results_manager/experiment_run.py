@@ -1,5 +1,5 @@
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Union
 
 import matplotlib.axes
@@ -7,7 +7,10 @@ import matplotlib.figure
 import plotly
 
 from experiment_results_manager.artifact import Artifact, ArtifactType
-from experiment_results_manager.html_util import matplotlib_fig_to_bytes
+from experiment_results_manager.html_util import (
+    matplotlib_fig_to_bytes,
+    plotly_fig_to_bytes,
+)
 
 
 class ExperimentRun:
@@ -60,16 +63,18 @@ class ExperimentRun:
         Initializes a new `ExperimentRun` object with the given experiment_id,
         `variant_id`, `run_id`, and `timestamp_utc`. If `timestamp_utc` is not provided,
         it defaults to the current UTC datetime. If `run_id` is not provided, it
-        is generated from the `timestamp_utc` using the format "%Y_%m_%d__%H_%M_%S".
+        is generated from the `timestamp_utc` using the format
+        "%Y_%m_%d__%H_%M_%S_%f", i.e. with microsecond precision so that runs
+        created within the same second get distinct ids.
         """
 
         self.experiment_id = experiment_id
         self.variant_id = variant_id
         self.timestamp_utc = (
-            timestamp_utc if timestamp_utc is not None else datetime.utcnow()
+            timestamp_utc if timestamp_utc is not None else datetime.now(timezone.utc)
         )
         if run_id is None:
-            self.run_id = self.timestamp_utc.strftime("%Y_%m_%d__%H_%M_%S")
+            self.run_id = self.timestamp_utc.strftime("%Y_%m_%d__%H_%M_%S_%f")
         else:
             self.run_id = run_id
 
@@ -140,7 +145,7 @@ class ExperimentRun:
         """Logs a figure to the experiment run."""
         if isinstance(fig, plotly.graph_objs.Figure):
             # Plotly figure
-            data = fig.to_json().encode("utf-8")
+            data = plotly_fig_to_bytes(fig)
             filename = f"{artifact_id}.plotly.json"
             artifact_type = ArtifactType.PLOTLY_JSON
         elif isinstance(fig, matplotlib.figure.Figure):
@@ -195,9 +200,6 @@ class ExperimentRun:
         represent utf-8). The text is stored as a binary artifact in the
         ExperimentRun.
         """
-        if isinstance(text, str):
-            data = text.encode("utf-8")
-        elif isinstance(bytes, str):
-            data = text
+        data = text.encode("utf-8") if isinstance(text, str) else text
 
         self.log_artifact(data, artifact_id, artifact_id, ArtifactType.BINARY)
@@ -1,28 +1,39 @@
+import functools
 import os
-from typing import Union
+from typing import Optional, Union
 
 import fsspec
+from fsspec.core import split_protocol
 
 
 def get_fs_from_uri(uri: str) -> fsspec.AbstractFileSystem:
-    return fsspec.filesystem(uri.split(":")[0])
+    protocol, _ = split_protocol(uri)
+    return _get_fs_for_protocol(protocol or "file")
+
+
+@functools.lru_cache(maxsize=32)
+def _get_fs_for_protocol(protocol: str) -> fsspec.AbstractFileSystem:
+    return fsspec.filesystem(protocol)
 
 
 def write_to_file(
-    str_or_bytes: Union[str, bytes], uri: str, fs: fsspec.AbstractFileSystem = None
+    str_or_bytes: Union[str, bytes],
+    uri: str,
+    fs: Optional[fsspec.AbstractFileSystem] = None,
 ) -> None:
     if fs is None:
         fs = get_fs_from_uri(uri)
 
+    if isinstance(str_or_bytes, str):
+        data = str_or_bytes.encode("utf-8")
+    else:
+        data = str_or_bytes
     fs.makedirs(os.path.dirname(uri), exist_ok=True)
-    with fs.open(uri, "wb") as f:
-        if isinstance(str_or_bytes, str):
-            data = str_or_bytes.encode("utf-8")
-        else:
-            data = str_or_bytes
-        f.write(data)
+    fs.pipe_file(uri, data)
+
 
+def read_file(uri: str, fs: Optional[fsspec.AbstractFileSystem] = None) -> bytes:
+    if fs is None:
+        fs = get_fs_from_uri(uri)
 
-def read_file(uri: str) -> bytes:
-    with fsspec.open(uri, "rb") as f:
-        return f.read()  # type: ignore
+    return fs.cat_file(uri)  # type: ignore[no-any-return]
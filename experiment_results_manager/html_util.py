@@ -1,9 +1,64 @@
 import io
+import posixpath
+import re
+import struct
 from datetime import datetime
-from typing import Any, Dict, List, Set, Union
+from itertools import chain
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
+import fsspec
 import matplotlib.axes
 import matplotlib.figure
+import numpy as np
+import plotly
+import plotly.graph_objs
+import plotly.io
+from plotly.offline import get_plotlyjs_version
+
+from experiment_results_manager.fsspec_util import get_fs_from_uri
+
+try:
+    from pybase64 import b64encode
+except ImportError:  # pragma: no cover
+    from base64 import b64encode  # type: ignore[assignment]
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+# plotly serializes with orjson when it is installed, which is several times
+# faster than its json.JSONEncoder-based engine on figures with large arrays
+_PLOTLY_JSON_ENGINE = "json" if orjson is None else "orjson"
+
+
+def _version_tuple(version: str) -> Tuple[int, ...]:
+    """Parses the leading `major.minor` of a version string, e.g. "2.28.0rc1"."""
+    return tuple(
+        int(re.match(r"\d*", part).group() or 0)  # type: ignore[union-attr]
+        for part in version.split(".")[:2]
+    )
+
+
+# Numeric arrays longer than this are stored as base64 typed arrays. Only the
+# dtypes below are supported. The bundled plotly.js (embedded by compare_runs)
+# decodes them from 2.28 and plotly.io.from_json reads them from plotly 5.24, so
+# older installs keep plain number arrays.
+_TYPED_ARRAY_MIN_SIZE = 1000
+_TYPED_ARRAY_DTYPES = {"i1", "u1", "i2", "u2", "i4", "u4", "f4", "f8"}
+_TYPED_ARRAYS_SUPPORTED = _version_tuple(get_plotlyjs_version()) >= (
+    2,
+    28,
+) and _version_tuple(plotly.__version__) >= (5, 24)
+
+_HTML_ESCAPE = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"}
+)
+
+
+def escape_html(value: Any) -> str:
+    """Escapes `str(value)` for use in HTML text and attribute values."""
+    return str(value).translate(_HTML_ESCAPE)
 
 
 def dicts_to_html_table(
@@ -13,35 +68,41 @@ def dicts_to_html_table(
     if type(sort_keys) == list:
         keys_list = sort_keys
     else:
-        keys: Set[str] = set()
-        for d in data:
-            keys.update(d.keys())
-        keys_list = list(keys)
+        keys: Set[str] = set(chain.from_iterable(data))
         if type(sort_keys) == bool and sort_keys:
-            keys_list.sort()
+            keys_list = sorted(keys)
+        else:
+            keys_list = list(keys)
 
     if len(keys_list) == 0:
         return ""
 
     # Create the table heading & header row
-    html = f"<h3>{dict_name}</h3>"
-    html += "<table><tr><th></th>"
+    parts: List[str] = [
+        f"<h3>{escape_html(dict_name)}</h3>",
+        "<table><tr><th></th>",
+    ]
+    parts_append = parts.append
     for i in range(len(data)):
-        html += f"<th>Run {i+1}</th>"
-    html += "</tr>"
+        parts_append(f"<th>Run {i+1}</th>")
+    parts_append("</tr>")
+
+    # Look up and escape every cell once, one column per run
+    col_values = [
+        [f"<td>{escape_html(d.get(key, ''))}</td>" for key in keys_list] for d in data
+    ]
 
     # Create the data rows
-    for key in keys_list:
-        html += f"<tr><td>{key}</td>"
-        for d in data:
-            value = d.get(key, "")
-            html += f"<td>{value}</td>"
-        html += "</tr>"
+    for i, key in enumerate(keys_list):
+        parts_append(f"<tr><td>{escape_html(key)}</td>")
+        for column in col_values:
+            parts_append(column[i])
+        parts_append("</tr>")
 
     # Close the table
-    html += "</table>"
+    parts_append("</table>")
 
-    return html
+    return "".join(parts)
 
 
 def timestamps_to_html_table(
@@ -50,28 +111,142 @@ def timestamps_to_html_table(
     run_ids: List[str],
     timestamps: List[datetime],
 ) -> str:
-    html = (
+    parts: List[str] = [
         "<table><tr><th></th><th>Experiment id</th><th>Variant id</th>"
         "<th>Run id</th><th>Timestamp (UTC)</th></tr>"
-    )
+    ]
     for i, experiment_id in enumerate(experiment_ids):
-        html += (
-            f"<tr><td>Run {i+1}</td><td>{experiment_id}</td><td>{variant_ids[i]}</td>"
-            f"<td>{run_ids[i]}</td><td>{timestamps[i]}</td></tr>"
+        parts.append(
+            f"<tr><td>Run {i+1}</td><td>{escape_html(experiment_id)}</td>"
+            f"<td>{escape_html(variant_ids[i])}</td><td>{escape_html(run_ids[i])}</td>"
+            f"<td>{timestamps[i]}</td></tr>"
         )
-    html += "</table>"
-    return html
+    parts.append("</table>")
+    return "".join(parts)
 
 
 def matplotlib_fig_to_bytes(
-    fig: matplotlib.figure.Figure, format: str = "png"
+    fig: matplotlib.figure.Figure, format: str = "png", compression_level: int = 1
 ) -> bytes:
+    """
+    Renders `fig` to image bytes. For PNGs, `compression_level` (0-9) is passed to
+    the zlib encoder: the default of 1 is several times faster to write than
+    Pillow's default of 6, at the cost of somewhat larger files.
+    """
     img_bytes = io.BytesIO()
-    fig.savefig(img_bytes, format=format, bbox_inches="tight")
-    img_bytes.seek(0)
+    fig.savefig(img_bytes, **_savefig_kwargs(format, compression_level))
     return img_bytes.getvalue()
 
 
+def matplotlib_fig_to_fs(
+    fig: matplotlib.figure.Figure,
+    uri: str,
+    fs: Optional[fsspec.AbstractFileSystem] = None,
+    format: str = "png",
+    compression_level: int = 1,
+) -> None:
+    """
+    Renders `fig` straight into the file at `uri`, without an intermediate in-memory
+    copy of the image. Takes the same options as `matplotlib_fig_to_bytes`.
+    """
+    if fs is None:
+        fs = get_fs_from_uri(uri)
+
+    fs.makedirs(posixpath.dirname(uri), exist_ok=True)
+    with fs.open(uri, "wb") as f:
+        fig.savefig(f, **_savefig_kwargs(format, compression_level))
+
+
+def _savefig_kwargs(format: str, compression_level: int) -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {"format": format, "bbox_inches": "tight"}
+    if format == "png":
+        kwargs["pil_kwargs"] = {"compress_level": compression_level}
+    return kwargs
+
+
+def plotly_fig_to_bytes(fig: plotly.graph_objs.Figure) -> bytes:
+    fig_dict = fig.to_dict()
+    if _TYPED_ARRAYS_SUPPORTED:
+        fig_dict["data"] = [_encode_typed_arrays(trace) for trace in fig_dict["data"]]
+    if orjson is not None:
+        # Dump straight to bytes, skipping plotly's decode / escape / re-encode
+        # of the whole JSON string
+        for trace in fig_dict["data"]:
+            trace.pop("uid", None)
+        try:
+            return orjson.dumps(
+                fig_dict, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            )
+        except TypeError:
+            # e.g. pandas objects, which plotly knows how to clean up
+            pass
+
+    json_str: str = plotly.io.to_json(
+        fig_dict, validate=False, engine=_PLOTLY_JSON_ENGINE
+    )
+    return json_str.encode("utf-8")
+
+
+def _encode_typed_arrays(value: Any) -> Any:
+    """
+    Replaces large numpy arrays in a trace dict with plotly typed array specs
+    (`{"dtype": "f8", "bdata": "<base64>"}`), which are smaller than JSON number
+    arrays and faster for plotly.js to load.
+    """
+    if isinstance(value, dict):
+        return {k: _encode_typed_arrays(v) for k, v in value.items()}
+    if isinstance(value, list) and value and isinstance(value[0], dict):
+        return [_encode_typed_arrays(v) for v in value]
+    if not isinstance(value, np.ndarray) or value.size <= _TYPED_ARRAY_MIN_SIZE:
+        return value
+
+    arr = value
+    if arr.dtype.kind in "iu" and arr.dtype.itemsize == 8:
+        # plotly.js has no 64-bit integer arrays, downcast when lossless
+        dtype = np.dtype(f"{arr.dtype.kind}4")
+        info = np.iinfo(dtype)
+        if arr.min() < info.min or arr.max() > info.max:
+            return value
+        arr = arr.astype(dtype)
+    arr = np.ascontiguousarray(arr, dtype=arr.dtype.newbyteorder("<"))
+
+    dtype_code = arr.dtype.str[1:]
+    if dtype_code not in _TYPED_ARRAY_DTYPES:
+        return value
+    spec = {"dtype": dtype_code, "bdata": b64encode(arr.tobytes()).decode("ascii")}
+    if arr.ndim > 1:
+        spec["shape"] = ",".join(str(n) for n in arr.shape)
+    return spec
+
+
+def image_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Returns the `(width, height)` of a PNG or JPEG image by reading its header,
+    or None if the format is not recognized.
+    """
+    if len(data) >= 24 and data[:8] == b"\x89PNG\r\n\x1a\n" and data[12:16] == b"IHDR":
+        width, height = struct.unpack(">II", data[16:24])
+        return width, height
+
+    if data[:2] == b"\xff\xd8":
+        # Walk the JPEG segments until a start-of-frame marker
+        pos = 2
+        while pos + 9 <= len(data):
+            if data[pos] != 0xFF:
+                return None
+            marker = data[pos + 1]
+            if marker == 0xFF:
+                pos += 1
+                continue
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack(">HH", data[pos + 5 : pos + 9])
+                return width, height
+            (segment_length,) = struct.unpack(">H", data[pos + 2 : pos + 4])
+            pos += 2 + segment_length
+
+    return None
+
+
 def human_readable_bytes(num_bytes: Union[int, float]) -> str:
     num_bytes = float(num_bytes)
     for unit in ["", "Ki", "Mi", "Gi", "Ti", "Pi", "Ei", "Zi"]:
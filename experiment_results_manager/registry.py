@@ -11,15 +11,61 @@ RUN_METADATA_FILE_NAME = "erm_metadata.json"
 
 
 def remove_scheme_if_exists(uri: str) -> str:
-    split_uri = uri.split("://", 1)
-    if len(split_uri) == 2:
-        return split_uri[1]
-    elif len(split_uri) == 1:
-        return uri
-    else:
-        raise ValueError(
-            f"Cannot parse URI that contains more than one instance of '://' - {uri}"
-        )
+    idx = uri.find("://")
+    return uri if idx < 0 else uri[idx + 3 :]
+
+
+def _scan_registry(fs: AbstractFileSystem, uri: str) -> List[str]:
+    """Recursively lists every file below `uri` with a single walk."""
+    return fs.find(uri)  # type: ignore[no-any-return]
+
+
+def _list_marked_dirs(
+    fs: AbstractFileSystem, uri: str, marker_file_name: str
+) -> List[str]:
+    """
+    Lists the directories below `uri` that contain `marker_file_name`, relative
+        to `uri`.
+    """
+    # fs.find returns paths in the filesystem's own form (e.g. absolute for
+    # local paths), so derive the prefix the same way
+    prefix_len = len(fs._strip_protocol(uri).rstrip("/")) + 1
+    suffix = "/" + marker_file_name
+    suffix_len = len(suffix)
+    ids = []
+    for path in _scan_registry(fs, uri):
+        path = remove_scheme_if_exists(path)
+        if not path.endswith(suffix):
+            continue
+        dir_id = path[prefix_len:-suffix_len]
+        if dir_id:
+            ids.append(dir_id)
+    return ids
+
+
+def _list_marked_children(
+    fs: AbstractFileSystem, uri: str, marker_file_name: str
+) -> List[str]:
+    """
+    Lists the immediate subdirectories of `uri` that contain `marker_file_name`.
+
+    Uses one unbounded `fs.find`: object stores (S3, GCS, ...) serve it with a single
+    paginated prefix listing, whereas a `maxdepth` makes fsspec fall back to one
+    listing per directory.
+    """
+    prefix = fs._strip_protocol(uri).rstrip("/") + "/"
+    prefix_len = len(prefix)
+    suffix = "/" + marker_file_name
+    suffix_len = len(suffix)
+    ids = []
+    for path in _scan_registry(fs, uri):
+        if not path.startswith(prefix) or not path.endswith(suffix):
+            continue
+        child = path[prefix_len:-suffix_len]
+        if child and "/" not in child:
+            ids.append(child)
+    # Keep the sorted output of the glob this replaced
+    return sorted(ids)
 
 
 def list_experiments(
@@ -40,17 +86,7 @@ def list_experiments(
     if fs is None:
         fs = get_fs_from_uri(registry_uri)
 
-    registry_uri_without_scheme = remove_scheme_if_exists(registry_uri)
-
-    paths = fs.glob(posixpath.join(registry_uri, "**", EXPERIMENT_FILE_NAME))
-    experiments = []
-    for path in paths:
-        path = remove_scheme_if_exists(path)
-        experiment_id = path[
-            len(registry_uri_without_scheme) + 1 : -len(EXPERIMENT_FILE_NAME) - 1
-        ]
-        experiments.append(experiment_id)
-    return experiments
+    return _list_marked_dirs(fs, registry_uri, EXPERIMENT_FILE_NAME)
 
 
 def list_variants(
@@ -74,21 +110,9 @@ def list_variants(
     if fs is None:
         fs = get_fs_from_uri(registry_uri)
 
-    experiment_uri_without_scheme = remove_scheme_if_exists(
-        posixpath.join(registry_uri, experiment_id)
-    )
-    paths = fs.glob(
-        posixpath.join(registry_uri, experiment_id, "**", VARIANT_FILE_NAME)
+    return _list_marked_children(
+        fs, posixpath.join(registry_uri, experiment_id), VARIANT_FILE_NAME
     )
-    variants = []
-    for path in paths:
-        path = remove_scheme_if_exists(path)
-        experiment_id = path[
-            len(experiment_uri_without_scheme) + 1 : -len(VARIANT_FILE_NAME) - 1
-        ]
-        variants.append(experiment_id)
-
-    return variants
 
 
 def list_runs(
@@ -115,23 +139,11 @@ def list_runs(
     if fs is None:
         fs = get_fs_from_uri(registry_uri)
 
-    variant_uri_without_scheme = remove_scheme_if_exists(
-        posixpath.join(registry_uri, experiment_id, variant_id)
-    )
-    paths = fs.glob(
-        posixpath.join(
-            registry_uri, experiment_id, variant_id, "**", RUN_METADATA_FILE_NAME
-        )
+    return _list_marked_children(
+        fs,
+        posixpath.join(registry_uri, experiment_id, variant_id),
+        RUN_METADATA_FILE_NAME,
     )
-    runs = []
-    for path in paths:
-        path = remove_scheme_if_exists(path)
-        experiment_id = path[
-            len(variant_uri_without_scheme) + 1 : -len(RUN_METADATA_FILE_NAME) - 1
-        ]
-        runs.append(experiment_id)
-
-    return runs
 
 
 def get_latest_run_for_variant(
@@ -157,5 +169,4 @@ def get_latest_run_for_variant(
     if fs is None:
         fs = get_fs_from_uri(registry_uri)
     runs = list_runs(registry_uri, experiment_id, variant_id, fs)
-    runs.sort()
-    return runs[-1]
+    return max(runs)
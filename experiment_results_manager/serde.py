@@ -1,12 +1,23 @@
+import functools
+import hashlib
 import json
+import os
+import pickle
 import posixpath
-from datetime import datetime
-from typing import Dict, Optional, Union
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Set, Union
 
 import fsspec
 from pydantic import BaseModel
 
-from experiment_results_manager.artifact import Artifact, ArtifactBase
+from experiment_results_manager.artifact import (
+    Artifact,
+    ArtifactBase,
+    LazyArtifact,
+    load_artifacts,
+)
 from experiment_results_manager.experiment_run import ExperimentRun
 from experiment_results_manager.fsspec_util import (
     get_fs_from_uri,
@@ -15,6 +26,29 @@ from experiment_results_manager.fsspec_util import (
 )
 from experiment_results_manager.registry import get_latest_run_for_variant
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+RUN_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "erm",
+)
+RUN_CACHE_MAX_BYTES = 2 * 1024**3
+
+# Errors raised when unpickling a corrupt cache file or one written by an
+# incompatible version of the package
+_UNPICKLING_ERRORS = (
+    pickle.UnpicklingError,
+    EOFError,
+    AttributeError,
+    ImportError,
+    IndexError,
+    TypeError,
+    ValueError,
+)
+
 
 class ExperimentRunMetadata(BaseModel):
     timestamp_utc: datetime
@@ -27,6 +61,25 @@ class ExperimentRunMetadata(BaseModel):
     artifacts: Dict[str, ArtifactBase]
 
 
+def _dump_json(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _load_json(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dump_metadata_json(er_metadata: ExperimentRunMetadata) -> bytes:
+    if orjson is not None:
+        # orjson serializes the datetime, dataclass and enum fields natively
+        return orjson.dumps(er_metadata.dict())
+    return er_metadata.json().encode("utf-8")
+
+
 def save_run_to_registry(
     er: ExperimentRun,
     experiment_registry_path: str,
@@ -50,35 +103,32 @@ def save_run_to_registry(
     if fs is None:
         fs = get_fs_from_uri(experiment_registry_path)
 
-    # Create the experiment registry file
-    registry_file_path = posixpath.join(experiment_registry_path, ".erm_registry.json")
-    if not fs.exists(registry_file_path):
-        file_contents = {
-            "created_timestamp_utc": datetime.utcnow().isoformat(),
-        }
-        write_to_file(json.dumps(file_contents), registry_file_path)
+    now_iso = datetime.now(timezone.utc).isoformat()
 
-    # Create the experiment file if it doesn't exist
+    # Create the registry, experiment and variant files if they don't exist
+    registry_file_path = posixpath.join(experiment_registry_path, ".erm_registry.json")
     experiment_file_path = posixpath.join(
         experiment_registry_path, er.experiment_id, ".erm_experiment.json"
     )
-    if not fs.exists(experiment_file_path):
-        file_contents = {
-            "experiment_id": er.experiment_id,
-            "created_timestamp_utc": datetime.utcnow().isoformat(),
-        }
-        write_to_file(json.dumps(file_contents), experiment_file_path)
-
-    # Create the variant file
     variant_file_path = posixpath.join(
         experiment_registry_path, er.experiment_id, er.variant_id, ".erm_variant.json"
     )
-    if not fs.exists(variant_file_path):
-        file_contents = {
-            "variant_id": er.variant_id,
-            "created_timestamp_utc": datetime.utcnow().isoformat(),
-        }
-        write_to_file(json.dumps(file_contents), variant_file_path)
+    _write_markers_if_absent(
+        fs,
+        {
+            registry_file_path: {
+                "created_timestamp_utc": now_iso,
+            },
+            experiment_file_path: {
+                "experiment_id": er.experiment_id,
+                "created_timestamp_utc": now_iso,
+            },
+            variant_file_path: {
+                "variant_id": er.variant_id,
+                "created_timestamp_utc": now_iso,
+            },
+        },
+    )
 
     run_path = posixpath.join(
         experiment_registry_path, er.experiment_id, er.variant_id, er.run_id
@@ -87,6 +137,57 @@ def save_run_to_registry(
     return run_path
 
 
+def _write_artifact(
+    artifact: Artifact, uri: str, fs: fsspec.AbstractFileSystem
+) -> None:
+    write_to_file(artifact.bytes, uri, fs)
+
+
+def _write_markers_if_absent(
+    fs: fsspec.AbstractFileSystem, markers: Dict[str, Dict[str, str]]
+) -> None:
+    """
+    Writes each registry marker file in `markers` (path -> contents) unless it
+    already exists.
+
+    Files are opened in exclusive-create mode, so an existing marker costs a single
+    failed create instead of an exists check. On filesystems that do not support
+    mode "xb", the markers missing from a listing of their parent directories are
+    written together with a single `fs.pipe` call instead.
+    """
+    pending: Dict[str, bytes] = {}
+    dir_listings: Dict[str, Set[str]] = {}
+    for uri, file_contents in markers.items():
+        data = _dump_json(file_contents)
+        fs.makedirs(posixpath.dirname(uri), exist_ok=True)
+        try:
+            with fs.open(uri, "xb") as f:
+                f.write(data)
+        except FileExistsError:
+            pass
+        except (NotImplementedError, ValueError):
+            if posixpath.basename(uri) not in _list_file_names(
+                fs, posixpath.dirname(uri), dir_listings
+            ):
+                pending[uri] = data
+
+    if len(pending) > 0:
+        fs.pipe(pending)
+
+
+def _list_file_names(
+    fs: fsspec.AbstractFileSystem, uri: str, dir_listings: Dict[str, Set[str]]
+) -> Set[str]:
+    """Lists the names in directory `uri`, memoized in `dir_listings`."""
+    if uri not in dir_listings:
+        try:
+            paths = fs.ls(uri, detail=False)
+        except FileNotFoundError:
+            paths = []
+        dir_listings[uri] = {posixpath.basename(p.rstrip("/")) for p in paths}
+    return dir_listings[uri]
+
+
 def save_run_to_path(
     er: ExperimentRun,
     path: str,
@@ -112,10 +213,15 @@ def save_run_to_path(
         fs = get_fs_from_uri(path)
 
     run_metadata_file_path = posixpath.join(path, "erm_metadata.json")
-    if fs.exists(run_metadata_file_path) and not overwrite:
-        raise FileExistsError(
-            f"A run already exists at {path}, set overwrite=True to overwrite"
-        )
+    if not overwrite:
+        try:
+            fs.info(run_metadata_file_path)
+        except FileNotFoundError:
+            pass
+        else:
+            raise FileExistsError(
+                f"A run already exists at {path}, set overwrite=True to overwrite"
+            )
 
     er_metadata = ExperimentRunMetadata(
         timestamp_utc=er.timestamp_utc,
@@ -125,30 +231,30 @@ def save_run_to_path(
         params=er.params,
         metrics=er.metrics,
         dicts=er.dicts,
-        artifacts=dict(
-            [
-                (
-                    a,
-                    ArtifactBase(
-                        er.artifacts[a].id,
-                        er.artifacts[a].filename,
-                        er.artifacts[a].artifact_type,
-                    ),
-                )
-                for a in er.artifacts.keys()
-            ]
-        ),
+        artifacts={
+            a: ArtifactBase(artifact.id, artifact.filename, artifact.artifact_type)
+            for a, artifact in er.artifacts.items()
+        },
     )
 
-    er_metadata_json = er_metadata.json()
-    write_to_file(er_metadata_json, run_metadata_file_path)
+    write_to_file(_dump_metadata_json(er_metadata), run_metadata_file_path, fs)
 
     artifacts_dir = posixpath.join(path, "artifacts")
-    for a in er.artifacts.keys():
-        write_to_file(
-            er.artifacts[a].bytes,
-            posixpath.join(artifacts_dir, er.artifacts[a].filename),
-        )
+    if len(er.artifacts) > 0:
+        # Artifact paths are independent, so overlap the per-file round trips
+        with ThreadPoolExecutor(max_workers=min(32, len(er.artifacts))) as pool:
+            # Read the bytes inside the workers, loading lazy artifacts overlaps too
+            futures = [
+                pool.submit(
+                    _write_artifact,
+                    artifact,
+                    posixpath.join(artifacts_dir, artifact.filename),
+                    fs,
+                )
+                for artifact in er.artifacts.values()
+            ]
+            for future in as_completed(futures):
+                future.result()
     print(f"experiment run saved to {path}")
 
 
@@ -157,6 +263,8 @@ def load_run_from_registry(
     experiment_id: str,
     variant_id: str = "main",
     run_id: Optional[str] = None,
+    prefetch: bool = False,
+    cache: bool = False,
 ) -> ExperimentRun:
     """
     Load an experiment run from its registry path.
@@ -167,6 +275,10 @@ def load_run_from_registry(
         variant_id (str, optional): The ID of the variant. Defaults to "main".
         run_id (str, optional): The ID of the run. If not provided, the latest run
             for the variant is used.
+        prefetch (bool, optional): Whether to read all artifacts up front instead
+            of on first access. Defaults to False.
+        cache (bool, optional): Whether to use the local disk cache of loaded runs,
+            see `load_run_from_path`. Defaults to False.
 
     Returns:
         ExperimentRun: The loaded experiment run.
@@ -185,30 +297,126 @@ def load_run_from_registry(
         experiment_registry_path, experiment_id, variant_id, run_id
     )
 
-    return load_run_from_path(run_path)
+    return load_run_from_path(run_path, prefetch=prefetch, cache=cache)
 
 
-def load_run_from_path(run_path: str) -> ExperimentRun:
+def load_run_from_path(
+    run_path: str, prefetch: bool = False, cache: bool = False
+) -> ExperimentRun:
     """Load an ExperimentRun object from a given path.
 
+    Artifacts are read lazily, the first time their bytes are accessed (e.g. by
+    `compare_runs`), unless `prefetch` is set.
+
+    With `cache` set, the fully loaded run (artifacts included) is pickled to
+    `RUN_CACHE_DIR`, keyed by the path and the version of its metadata file, and
+    later calls read it from there as long as the stored run is unchanged. The
+    cache is capped at `RUN_CACHE_MAX_BYTES`, evicting least recently used runs.
+
     Args:
         run_path (str): The path to the ExperimentRun directory.
+        prefetch (bool, optional): Whether to read all artifacts up front.
+            Defaults to False.
+        cache (bool, optional): Whether to use the local disk cache. Implies
+            `prefetch`. Defaults to False.
 
     Returns:
         ExperimentRun: An ExperimentRun object populated with data from the given path.
     """
-    er_metadata_dict = json.loads(
-        read_file(posixpath.join(run_path, "erm_metadata.json")).decode("utf-8")
+    if not cache:
+        return _load_run_from_path(run_path, prefetch)
+
+    fs = get_fs_from_uri(run_path)
+    version = fs.ukey(posixpath.join(run_path, "erm_metadata.json"))
+    key = hashlib.sha256(f"{run_path}\0{version}".encode("utf-8")).hexdigest()
+    cache_file_path = os.path.join(RUN_CACHE_DIR, f"{key}.pkl")
+    try:
+        with open(cache_file_path, "rb") as f:
+            cached = pickle.load(f)
+    except OSError:
+        cached = None
+    except _UNPICKLING_ERRORS:
+        # Truncated, foreign or written for an older class layout
+        cached = None
+        _remove_run_cache_file(cache_file_path)
+    if isinstance(cached, ExperimentRun):
+        try:
+            os.utime(cache_file_path)
+        except OSError:
+            # e.g. evicted by another process in the meantime
+            pass
+        return cached
+
+    er = _load_run_from_path(run_path, prefetch=True)
+    try:
+        _write_run_cache_file(er, cache_file_path)
+    except OSError:
+        # The cache is best effort, e.g. RUN_CACHE_DIR may not be writable
+        pass
+    return er
+
+
+def _remove_run_cache_file(cache_file_path: str) -> None:
+    try:
+        os.remove(cache_file_path)
+    except OSError:
+        pass
+
+
+def _write_run_cache_file(er: ExperimentRun, cache_file_path: str) -> None:
+    os.makedirs(RUN_CACHE_DIR, exist_ok=True)
+    # Write to a temporary file first so that readers never see partial files
+    fd, tmp_path = tempfile.mkstemp(dir=RUN_CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(er, f, protocol=5)
+        os.replace(tmp_path, cache_file_path)
+    except BaseException:
+        _remove_run_cache_file(tmp_path)
+        raise
+
+    # Other processes may evict entries concurrently, skip the ones that vanish
+    cache_files = []
+    for entry in os.scandir(RUN_CACHE_DIR):
+        if not entry.name.endswith(".pkl") or not entry.is_file():
+            continue
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        cache_files.append((stat.st_mtime, stat.st_size, entry.path))
+    total_size = sum(size for _, size, _ in cache_files)
+    for _, size, path in sorted(cache_files):
+        if total_size <= RUN_CACHE_MAX_BYTES:
+            break
+        total_size -= size
+        _remove_run_cache_file(path)
+
+
+def _load_run_from_path(run_path: str, prefetch: bool) -> ExperimentRun:
+    fs = get_fs_from_uri(run_path)
+    er_metadata_dict = _load_json(
+        read_file(posixpath.join(run_path, "erm_metadata.json"), fs)
     )
-    er_metadata = ExperimentRunMetadata(**er_metadata_dict)
-
-    artifacts = {}
-    for a in er_metadata.artifacts.keys():
-        artifact_base = er_metadata.artifacts[a]
-        data = read_file(posixpath.join(run_path, "artifacts", artifact_base.filename))
-        artifacts[a] = Artifact(
-            artifact_base.id, artifact_base.filename, artifact_base.artifact_type, data
-        )
+    er_metadata = ExperimentRunMetadata.parse_obj(er_metadata_dict)
+
+    artifacts_path = posixpath.join(run_path, "artifacts")
+    artifacts: Dict[str, Artifact]
+    if prefetch:
+        artifacts = load_artifacts(er_metadata.artifacts, artifacts_path, fs=fs)
+    else:
+        artifacts = {
+            a: LazyArtifact(
+                artifact_base.id,
+                artifact_base.filename,
+                artifact_base.artifact_type,
+                functools.partial(
+                    fs.cat_file,
+                    posixpath.join(artifacts_path, artifact_base.filename),
+                ),
+            )
+            for a, artifact_base in er_metadata.artifacts.items()
+        }
 
     er = ExperimentRun(
         er_metadata.experiment_id,
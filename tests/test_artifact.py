@@ -0,0 +1,26 @@
+from experiment_results_manager.artifact import Artifact, ArtifactType, LazyArtifact
+
+
+def test_artifact_caches_reset_on_bytes_assignment():
+    artifact = Artifact("a", "a.png", ArtifactType.PNG, b"old")
+    old_hash = artifact.content_hash()
+    old_uri = artifact.data_uri("image/png")
+
+    artifact.bytes = b"new"
+    assert artifact.content_hash() != old_hash
+    assert artifact.data_uri("image/png") != old_uri
+
+
+def test_lazy_artifact_caches_reset_on_bytes_assignment():
+    artifact = LazyArtifact("a", "a.png", ArtifactType.PNG, lambda: b"old")
+    old_hash = artifact.content_hash()
+
+    artifact.bytes = b"new"
+    assert artifact.bytes == b"new"
+    assert artifact.content_hash() != old_hash
+
+
+def test_artifact_data_uri_mime_type():
+    artifact = Artifact("a", "a.jpg", ArtifactType.JPG, b"data")
+    assert artifact.data_uri("image/png").startswith("data:image/png;base64,")
+    assert artifact.data_uri("image/jpeg").startswith("data:image/jpeg;base64,")
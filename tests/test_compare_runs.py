@@ -0,0 +1,185 @@
+import io
+import os
+import re
+import threading
+import time
+from typing import Any, Tuple
+
+import plotly.graph_objs as go
+import pytest
+from PIL import Image
+
+from experiment_results_manager import artifact as artifact_module
+from experiment_results_manager.artifact import ArtifactType, LazyArtifact
+from experiment_results_manager.compare_runs import compare_runs
+from experiment_results_manager.experiment_run import ExperimentRun
+
+
+@pytest.fixture(scope="function")
+def experiment_run():
+    er = ExperimentRun(experiment_id="test_experiment")
+    er.log_param("param_key", "param_value")
+    er.log_artifact(b"test data", "test_artifact", "test_artifact.bin")
+    return er
+
+
+def test_compare_runs_cache(experiment_run: ExperimentRun):
+    html = compare_runs(experiment_run)
+    assert compare_runs(experiment_run) is html
+    assert compare_runs(experiment_run, ignore_cache=True) is not html
+
+    experiment_run.log_metric("metric_key", 1.23)
+    html2 = compare_runs(experiment_run)
+    assert html2 is not html
+    assert "metric_key" in html2
+
+    experiment_run.log_artifact(
+        b"other data", "test_artifact", "test_artifact.bin", ArtifactType.BINARY
+    )
+    assert compare_runs(experiment_run) is not html2
+
+
+def test_compare_runs_cache_artifact_bytes_changed(experiment_run: ExperimentRun):
+    html = compare_runs(experiment_run)
+    experiment_run.artifacts["test_artifact"].bytes = b"changed test data"
+    assert compare_runs(experiment_run) != html
+
+
+def test_compare_runs_cache_fresh_plotly_div_ids(experiment_run: ExperimentRun):
+    experiment_run.log_figure(go.Figure(data=go.Scatter(y=[1, 3, 2])), "figure")
+    div_ids = set()
+    for _ in range(2):
+        html = compare_runs(experiment_run)
+        ids = re.findall(r'<div id="(plotly-[0-9a-f]+)"', html)
+        assert len(ids) == 1
+        assert f'Plotly.newPlot("{ids[0]}"' in html
+        div_ids.update(ids)
+    assert len(div_ids) == 2
+
+
+def test_compare_runs_loads_lazy_artifacts_concurrently():
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def loader() -> bytes:
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return b"lazy data"
+
+    er = ExperimentRun(experiment_id="test_experiment")
+    for i in range(10):
+        er.artifacts[f"a{i}"] = LazyArtifact(
+            f"a{i}", f"a{i}.bin", ArtifactType.BINARY, loader
+        )
+    compare_runs(er)
+    assert peak > 1
+
+
+def _image_bytes(format: str, size: Tuple[int, int], **save_kwargs: Any) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color=(255, 0, 0)).save(buffer, format=format, **save_kwargs)
+    return buffer.getvalue()
+
+
+def _exif() -> Image.Exif:
+    exif = Image.Exif()
+    exif[0x010F] = "test camera"  # Make
+    return exif
+
+
+@pytest.mark.parametrize(
+    "artifact_type, data, size",
+    [
+        (ArtifactType.PNG, _image_bytes("PNG", (31, 17)), (31, 17)),
+        (ArtifactType.JPG, _image_bytes("JPEG", (40, 25)), (40, 25)),
+        (ArtifactType.JPG, _image_bytes("JPEG", (23, 52), exif=_exif()), (23, 52)),
+    ],
+)
+def test_compare_runs_image_files(
+    tmp_path, artifact_type: ArtifactType, data: bytes, size: Tuple[int, int]
+):
+    er = ExperimentRun(experiment_id="test_experiment")
+    ext = artifact_type.value
+    er.log_artifact(data, "image", f"image.{ext}", artifact_type)
+    er.log_artifact(data, "../escape", f"escape.{ext}", artifact_type)
+
+    out_dir = tmp_path / "out"
+    html = compare_runs(er, inline_images=False, out_dir=str(out_dir))
+
+    written = sorted(os.listdir(out_dir))
+    assert len(written) == 2
+    assert f"image_1.{ext}" in written
+    assert not os.path.exists(tmp_path / f"escape_1.{ext}")
+    for filename in written:
+        assert (out_dir / filename).read_bytes() == data
+        assert f'<img src="{filename}" width="{size[0]}" height="{size[1]}"' in html
+
+
+def test_compare_runs_cache_options(experiment_run: ExperimentRun):
+    html = compare_runs(experiment_run)
+    assert compare_runs(experiment_run, inline_images=True, extra=[1]) is html
+    assert compare_runs(experiment_run, inject_css=True) is not html
+
+
+def test_compare_runs_dedupes_identical_images(monkeypatch: pytest.MonkeyPatch):
+    encoded = []
+    b64encode = artifact_module.b64encode
+
+    def counting_b64encode(data: bytes) -> bytes:
+        encoded.append(data)
+        return b64encode(data)
+
+    monkeypatch.setattr(artifact_module, "b64encode", counting_b64encode)
+    data = _image_bytes("PNG", (8, 8))
+    runs = []
+    for _ in range(6):
+        er = ExperimentRun(experiment_id="test_experiment")
+        er.log_artifact(data, "image", "image.png", ArtifactType.PNG)
+        runs.append(er)
+
+    html = compare_runs(*runs, ignore_cache=True)
+    assert len(encoded) == 1
+    data_uri = runs[0].artifacts["image"].data_uri("image/png")
+    assert html.count(data_uri) == 6
+
+
+def test_compare_runs_escapes():
+    unsafe = """<x> & "y" 'z'"""
+    escaped = "&lt;x&gt; &amp; &quot;y&quot; &#x27;z&#x27;"
+    er = ExperimentRun(experiment_id="test_experiment")
+    er.log_param(unsafe, unsafe)
+    er.log_metric("metric", unsafe)
+    er.log_dict(unsafe, {"key": 1})
+    er.log_artifact(b"test data", unsafe, unsafe, ArtifactType.BINARY)
+
+    html = compare_runs(er, ignore_cache=True)
+
+    assert unsafe not in html
+    assert html.count(escaped) == 6
+    assert f"<h3>{escaped}</h3>" in html
+    assert f"Filename: {escaped}" in html
+
+
+def test_compare_runs_plotly_title_closing_script_tag():
+    title = "</script><script>alert(1)</script>"
+    runs = []
+    for _ in range(2):
+        er = ExperimentRun(experiment_id="test_experiment")
+        er.log_figure(
+            go.Figure(data=go.Scatter(y=[1, 3, 2]), layout_title_text=title), "figure"
+        )
+        runs.append(er)
+
+    html = compare_runs(*runs, ignore_cache=True)
+
+    # The plotly.js prelude comes before the artifacts
+    figures_html = html[html.index("<h3>Artifacts</h3>") :]
+    assert figures_html.count("plotly-graph-div") == 2
+    assert figures_html.count("</script>") == 2
+    assert title not in html
@@ -1,10 +1,15 @@
+import base64
+import json
 import os
 import tempfile
+from datetime import datetime, timezone
 
 import matplotlib.pyplot as plt
+import numpy as np
 import plotly.graph_objs as go
 import pytest
 
+from experiment_results_manager import html_util
 from experiment_results_manager.artifact import ArtifactType
 from experiment_results_manager.experiment_run import ExperimentRun
 
@@ -14,6 +19,12 @@ def experiment_run():
     return ExperimentRun(experiment_id="test_experiment")
 
 
+def test_run_id_from_timestamp():
+    timestamp = datetime(2023, 4, 5, 6, 7, 8, 9, tzinfo=timezone.utc)
+    er = ExperimentRun(experiment_id="test_experiment", timestamp_utc=timestamp)
+    assert er.run_id == "2023_04_05__06_07_08_000009"
+
+
 def test_log_param(experiment_run: ExperimentRun):
     experiment_run.log_param("param_key", "param_value")
     assert "param_key" in experiment_run.params
@@ -91,3 +102,39 @@ def test_log_figure(experiment_run: ExperimentRun):
         == ArtifactType.PLOTLY_JSON
     )
     assert experiment_run.artifacts["test_artifact2"].bytes is not None
+
+
+@pytest.mark.skipif(
+    not html_util._TYPED_ARRAYS_SUPPORTED,
+    reason="bundled plotly.js cannot decode typed arrays",
+)
+def test_log_figure_plotly_typed_arrays(experiment_run: ExperimentRun):
+    y = np.linspace(0, 1, 5000)
+    fig = go.Figure(data=go.Scatter(y=y))
+    experiment_run.log_figure(fig, "test_artifact")
+    trace = json.loads(experiment_run.artifacts["test_artifact"].bytes)["data"][0]
+    assert trace["y"]["dtype"] == "f8"
+    decoded = np.frombuffer(base64.b64decode(trace["y"]["bdata"]), dtype="<f8")
+    np.testing.assert_array_equal(decoded, y)
+
+
+def test_plotly_fig_to_bytes_plain_arrays(monkeypatch: pytest.MonkeyPatch):
+    # plotly < 6 leaves numpy arrays in Figure.to_dict(), which must then be
+    # written as plain number arrays for an older bundled plotly.js
+    monkeypatch.setattr(html_util, "_TYPED_ARRAYS_SUPPORTED", False)
+    y = np.linspace(0, 1, 5000)
+    fig = go.Figure()
+    monkeypatch.setattr(
+        fig, "to_dict", lambda: {"data": [{"type": "scatter", "y": y}], "layout": {}}
+    )
+    trace = json.loads(html_util.plotly_fig_to_bytes(fig))["data"][0]
+    assert isinstance(trace["y"], list)
+    np.testing.assert_array_equal(trace["y"], y)
+
+
+def test_log_text(experiment_run: ExperimentRun):
+    experiment_run.log_text("lorem ipsum", "text")
+    experiment_run.log_text(b"dolor sit amet", "text_bytes")
+    assert experiment_run.artifacts["text"].bytes == b"lorem ipsum"
+    assert experiment_run.artifacts["text_bytes"].bytes == b"dolor sit amet"
+    assert experiment_run.artifacts["text_bytes"].artifact_type == ArtifactType.BINARY
@@ -0,0 +1,57 @@
+import io
+from typing import Tuple
+
+import fsspec
+import matplotlib.pyplot as plt
+import pytest
+from PIL import Image
+
+from experiment_results_manager.html_util import (
+    dicts_to_html_table,
+    image_size,
+    matplotlib_fig_to_bytes,
+    matplotlib_fig_to_fs,
+)
+
+
+def test_matplotlib_fig_to_fs():
+    fig, ax = plt.subplots()
+    ax.plot([1, 2, 3], [3, 1, 2])
+    uri = "memory://test_matplotlib_fig_to_fs/figures/fig.png"
+
+    matplotlib_fig_to_fs(fig, uri)
+
+    fs = fsspec.filesystem("memory")
+    assert fs.cat_file(uri) == matplotlib_fig_to_bytes(fig)
+    fs.rm("/test_matplotlib_fig_to_fs", recursive=True)
+    plt.close(fig)
+
+
+def _image_bytes(format: str, size: Tuple[int, int]) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size).save(buffer, format=format)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("format", ["PNG", "JPEG"])
+def test_image_size(format: str):
+    assert image_size(_image_bytes(format, (31, 17))) == (31, 17)
+
+
+@pytest.mark.parametrize("format", ["PNG", "JPEG"])
+def test_image_size_truncated(format: str):
+    data = _image_bytes(format, (31, 17))
+    for length in range(len(data) // 2):
+        size = image_size(data[:length])
+        assert size is None or size == (31, 17)
+
+
+def test_dicts_to_html_table_escapes():
+    html = dicts_to_html_table(
+        "<name> & 'dict'", [{'<key> & "k"': "<value> & 'v'"}, {"x": '"'}]
+    )
+    assert "<name>" not in html and "<key>" not in html and "<value>" not in html
+    assert "<h3>&lt;name&gt; &amp; &#x27;dict&#x27;</h3>" in html
+    assert "<td>&lt;key&gt; &amp; &quot;k&quot;</td>" in html
+    assert "<td>&lt;value&gt; &amp; &#x27;v&#x27;</td>" in html
+    assert "<td>&quot;</td>" in html
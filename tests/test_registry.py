@@ -0,0 +1,58 @@
+from experiment_results_manager.experiment_run import ExperimentRun
+from experiment_results_manager.fsspec_util import get_fs_from_uri
+from experiment_results_manager.registry import (
+    get_latest_run_for_variant,
+    list_experiments,
+    list_runs,
+    list_variants,
+)
+from experiment_results_manager.serde import save_run_to_registry
+
+
+def test_list_registry(tmp_path):
+    registry_uri = f"file://{tmp_path}/registry"
+    run_ids = []
+    for variant_id in ["zeta", "a", "omega", "beta", "a", "mid", "a"]:
+        er = ExperimentRun(experiment_id="exp", variant_id=variant_id)
+        save_run_to_registry(er, registry_uri)
+        if variant_id == "a":
+            run_ids.append(er.run_id)
+
+    assert list_experiments(registry_uri) == ["exp"]
+    assert list_variants(registry_uri, "exp") == ["a", "beta", "mid", "omega", "zeta"]
+    assert list_runs(registry_uri, "exp", "a") == sorted(run_ids)
+    assert get_latest_run_for_variant(registry_uri, "exp", "a") == max(run_ids)
+
+
+def test_list_registry_relative_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    er = ExperimentRun(experiment_id="exp")
+    save_run_to_registry(er, "registry")
+
+    assert list_experiments("registry") == ["exp"]
+    assert list_variants("registry", "exp") == ["main"]
+    assert list_runs("registry", "exp", "main") == [er.run_id]
+
+
+def test_list_runs_single_listing(tmp_path, monkeypatch):
+    registry_uri = f"file://{tmp_path}/registry"
+    run_ids = []
+    for _ in range(3):
+        er = ExperimentRun(experiment_id="exp")
+        save_run_to_registry(er, registry_uri)
+        run_ids.append(er.run_id)
+
+    fs = get_fs_from_uri(registry_uri)
+    find_calls = []
+    find = fs.find
+
+    def counting_find(*args, **kwargs):
+        find_calls.append(args)
+        return find(*args, **kwargs)
+
+    monkeypatch.setattr(fs, "find", counting_find)
+    # No per-run existence checks
+    monkeypatch.setattr(fs, "exists", None)
+
+    assert list_runs(registry_uri, "exp", "main", fs) == run_ids
+    assert len(find_calls) == 1
@@ -0,0 +1,171 @@
+import os
+import pickle
+import threading
+import time
+from typing import List
+
+import pytest
+from fsspec.implementations.memory import MemoryFileSystem
+
+from experiment_results_manager import serde
+from experiment_results_manager.artifact import ArtifactType, LazyArtifact
+from experiment_results_manager.experiment_run import ExperimentRun
+from experiment_results_manager.registry import list_runs
+from experiment_results_manager.serde import (
+    load_run_from_path,
+    save_run_to_path,
+    save_run_to_registry,
+)
+
+
+@pytest.fixture(scope="function")
+def run_path(tmp_path):
+    er = ExperimentRun(experiment_id="test_experiment")
+    er.log_param("param_key", "param_value")
+    er.log_artifact(b"test data", "test_artifact", "test_artifact.bin")
+    path = f"file://{tmp_path}/run"
+    save_run_to_path(er, path)
+    return path
+
+
+def test_load_run_lazy(run_path: str):
+    er = load_run_from_path(run_path)
+    assert er.params == {"param_key": "param_value"}
+    artifact = er.artifacts["test_artifact"]
+    assert isinstance(artifact, LazyArtifact)
+    assert not artifact.is_loaded
+    assert artifact.bytes == b"test data"
+
+
+def test_load_run_prefetch(run_path: str):
+    er = load_run_from_path(run_path, prefetch=True)
+    artifact = er.artifacts["test_artifact"]
+    assert not isinstance(artifact, LazyArtifact)
+    assert artifact.bytes == b"test data"
+
+
+def test_load_run_cache(run_path: str, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    monkeypatch.setattr(serde, "RUN_CACHE_DIR", cache_dir)
+
+    er = load_run_from_path(run_path, cache=True)
+    assert len(os.listdir(cache_dir)) == 1
+    cached_er = load_run_from_path(run_path, cache=True)
+    assert cached_er.params == er.params
+    assert cached_er.artifacts["test_artifact"].bytes == b"test data"
+
+    er.log_param("param_key", "new_value")
+    save_run_to_path(er, run_path, overwrite=True)
+    assert load_run_from_path(run_path, cache=True).params["param_key"] == "new_value"
+
+
+@pytest.mark.parametrize(
+    "contents",
+    [
+        b"",
+        b"\x80\x05garbage",
+        b"cexperiment_results_manager.artifact\nRemovedClass\n.",
+        pickle.dumps({}),
+    ],
+)
+def test_load_run_cache_corrupt_entry(
+    run_path: str, tmp_path, monkeypatch, contents: bytes
+):
+    cache_dir = str(tmp_path / "cache")
+    monkeypatch.setattr(serde, "RUN_CACHE_DIR", cache_dir)
+
+    load_run_from_path(run_path, cache=True)
+    (cache_file,) = os.listdir(cache_dir)
+    with open(os.path.join(cache_dir, cache_file), "wb") as f:
+        f.write(contents)
+
+    er = load_run_from_path(run_path, cache=True)
+    assert er.params == {"param_key": "param_value"}
+    with open(os.path.join(cache_dir, cache_file), "rb") as f:
+        assert pickle.load(f).params == er.params
+
+
+class _NoExclusiveCreateFileSystem(MemoryFileSystem):
+    """A memory filesystem that, like some object stores, rejects mode "xb"."""
+
+    cachable = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.piped: List[List[str]] = []
+
+    def _open(self, path, mode="rb", *args, **kwargs):
+        if mode == "xb":
+            raise ValueError("mode 'xb' is not supported")
+        return super()._open(path, mode, *args, **kwargs)
+
+    def pipe(self, path, value=None, **kwargs):
+        self.piped.append(sorted(self._strip_protocol(p) for p in path))
+        return super().pipe(path, value, **kwargs)
+
+
+def test_save_run_to_registry_without_exclusive_create():
+    fs = _NoExclusiveCreateFileSystem()
+    registry_uri = "memory://test_no_exclusive_create"
+    marker_paths = [
+        "/test_no_exclusive_create/.erm_registry.json",
+        "/test_no_exclusive_create/exp/.erm_experiment.json",
+        "/test_no_exclusive_create/exp/main/.erm_variant.json",
+    ]
+    try:
+        save_run_to_registry(ExperimentRun(experiment_id="exp"), registry_uri, fs=fs)
+        assert fs.piped == [sorted(marker_paths)]
+        markers = {path: fs.cat_file(path) for path in marker_paths}
+
+        save_run_to_registry(ExperimentRun(experiment_id="exp"), registry_uri, fs=fs)
+        assert len(fs.piped) == 1
+        assert {path: fs.cat_file(path) for path in marker_paths} == markers
+        assert len(list_runs(registry_uri, "exp", "main", fs=fs)) == 2
+    finally:
+        fs.rm("/test_no_exclusive_create", recursive=True)
+
+
+def test_load_run_cache_dir_not_writable(run_path: str, tmp_path, monkeypatch):
+    not_a_dir = tmp_path / "not_a_dir"
+    not_a_dir.write_bytes(b"")
+    monkeypatch.setattr(serde, "RUN_CACHE_DIR", str(not_a_dir / "cache"))
+
+    er = load_run_from_path(run_path, cache=True)
+    assert er.params == {"param_key": "param_value"}
+
+
+def test_load_run_cache_write_failure(run_path: str, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(serde, "RUN_CACHE_DIR", str(cache_dir))
+
+    def failing_dump(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(serde.pickle, "dump", failing_dump)
+    er = load_run_from_path(run_path, cache=True)
+    assert er.params == {"param_key": "param_value"}
+    assert os.listdir(cache_dir) == []
+
+
+def test_save_run_loads_lazy_artifacts_concurrently(tmp_path):
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def loader() -> bytes:
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return b"lazy data"
+
+    er = ExperimentRun(experiment_id="test_experiment")
+    for i in range(5):
+        er.artifacts[f"a{i}"] = LazyArtifact(
+            f"a{i}", f"a{i}.bin", ArtifactType.BINARY, loader
+        )
+    save_run_to_path(er, f"file://{tmp_path}/run")
+    assert peak > 1